@@ -4,56 +4,496 @@ PDF和Word表格提取工具 - Web版本
 保持本地版的所有功能，只去掉input()函数
 """
 
+import io
 import os
 import re
+import sys
 import logging
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
 import pdfplumber
 import pandas as pd
 from docx import Document
-from typing import List, Dict, Optional, Tuple
+from lxml import etree
+from typing import List, Dict, Optional, Tuple, NamedTuple, Pattern, Union
 from io import BytesIO
 import openpyxl
-from openpyxl.styles import Font, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, Border, Side, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
+
+# pypdfium2 提取纯文本比 pdfplumber 快得多，但按内容流顺序输出文本、不按版面位置排序，
+# 绘制顺序与阅读顺序不同的PDF会打乱行序，因此只在显式启用（use_pdfium）时使用
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# PDFium 不是线程安全的，Streamlit 每个会话在各自的线程中运行，进程内的所有 PDFium 调用都须持有此锁
+_PDFIUM_LOCK = threading.Lock()
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 子进程统一用 spawn 启动：Streamlit 服务进程是多线程的，fork 会复制其他线程持有的锁（如正在调用 PDFium 的线程），可能导致子进程死锁
+_MP_CONTEXT = multiprocessing.get_context('spawn')
+
 # 汉字数字
 CN_NUM = '零一二三四五六七八九十百千万亿〇壹贰叁肆伍陆柒捌玖拾'
+# 逐字符判断用集合（CN_NUM 字符串保留用于拼接正则字符类）
+_CN_NUM_SET = frozenset(CN_NUM)
+
+# 编号样例类型判断（模块级预编译，避免每次调用重新查找/编译）
+_DISPATCH_DOTTED = re.compile(r'^\d+(\.\d+)+\.?$')
+_DISPATCH_NUM_PAREN = re.compile(r'^\d+[）)]$')
+_DISPATCH_PAREN_NUM = re.compile(r'^[（(]\d+[）)]$')
+_DISPATCH_PAREN_CN = re.compile(r'^[（(][零一二三四五六七八九十百千万亿]+[）)]$')
+_DISPATCH_NUM_DOT = re.compile(r'^\d+\.$')
+
+# 各类型样例对应的编号正则
+_FUZZY_DOTTED = re.compile(r'^(\d+(?:\.\d+)+[\.\s\u3000．、]*)(.*)$')
+_FUZZY_NUM_PAREN = re.compile(r'^(\d+[\)\）])(.*)$')
+_FUZZY_PAREN_NUM = re.compile(r'^([（(]\d+[\)\）])(.*)$')
+_FUZZY_PAREN_CN = re.compile(r'^([（(][零一二三四五六七八九十百千万亿]+[\)\）])(.*)$')
+_FUZZY_NUM_DOT = re.compile(r'^(\d+\.)(.*)$')
+
+# 自动识别模块层级（extract_tables_from_pdf_bid）：按行首字符分派，只运行可能匹配的正则
+_RECLASSIFY_CN_SET = frozenset('一二三四五六七八九十')
+_RECLASSIFY_PAREN_SET = frozenset('（(')
+_RECLASSIFY_CN_LVL1 = re.compile(r'[一二三四五六七八九十]+、')
+_RECLASSIFY_PAREN_LVL2 = re.compile(r'[（(][一二三四五六七八九十]+[）)]')
+# 五段、六段的数字编号同样以四段编号开头，统一归为一级
+_RECLASSIFY_DOTTED_LVL1 = re.compile(r'\d+\.\d+\.\d+\.\d+')
+_RECLASSIFY_NUM_LVL3 = re.compile(r'\d+[、）)]')
+
+# 页码判断
+_PAGE_INDICATOR_RE = re.compile(r'[第页]|[Pp]age')
+
+# 样例分词：数字串、汉字数字串、括号、方括号、分隔符、汉字串，其余字符单独成词
+_TEMPLATE_TOKEN_RE = re.compile(
+    rf'(\d+)|([{CN_NUM}]+)|([()（）])|([【】])|([.、])|([\u4e00-\u9fa5]+)|(.)', re.S
+)
+
+# 空白字符删除表，等价于 re.sub(r'[\s\u3000]', '', text)（Unicode 空白字符均不超过 U+3000）
+_WS_DELETE_TABLE = dict.fromkeys((c for c in range(0x3001) if chr(c).isspace()), None)
+
+# Excel 输出：长描述按编号分段（编号带捕获分组，split 时保留编号本身）
+_DESC_NUMBER_PATTERNS = [re.compile(f'({pattern})') for pattern in (
+    # 中文数字格式
+    r'[一二三四五六七八九十]+、',  # 一、二、三、
+    r'[（(][一二三四五六七八九十]+[）)]',  # （一）（二）
+    r'[（(]\d+[）)]',  # （1）（2）
+    r'\d+、',  # 1、2、
+    r'\d+\.',  # 1.2.3.
+    r'\d+）',  # 1）2）
+    r'\d+\)',  # 1)2)
+
+    # 英文数字格式（r'\d+\.' 已在上面，这里不再重复）
+    r'[a-z]+\)',  # a)b)c)
+    r'[A-Z]+\.',  # A.B.C.
+    r'[i]+\)',  # i)ii)iii)
+)]
+_SENTENCE_SPLIT_RE = re.compile(r'[。！？]')
+# Excel 输出：单元格清理
+_MULTI_SPACE_RE = re.compile(r'\s+')
+_EXCEL_ILLEGAL_RE = re.compile(r'[^\w\s\u4e00-\u9fff.,，。！？：:()（）\-]')
+# 调试信息中的特殊标记，按此顺序移除
+_DEBUG_MARKS = ('🔍', '✅', '⚠️', '📋')
+
+
+def _printable_text(value):
+    """转换为字符串，只保留可打印字符和常见的中文字符"""
+    value_str = str(value)
+    # 绝大多数单元格本身全部可打印，整串判断一次即可，无需逐字符处理
+    if value_str.isprintable():
+        return value_str
+    return ''.join(char for char in value_str if char.isprintable() or '\u4e00' <= char <= '\u9fff')
+
+
+def _clean_cell_text(value):
+    """清理单元格值：只保留可打印字符，移除调试标记，合并多余空白，移除Excel不允许的特殊字符"""
+    text = _printable_text(value)
+    for mark in _DEBUG_MARKS:
+        text = text.replace(mark, '')
+    text = _MULTI_SPACE_RE.sub(' ', text.strip())
+    return _EXCEL_ILLEGAL_RE.sub('', text)
+
+
+def _is_page_content(text):
+    """检查是否为页码信息（包含"第"、"页"、"Page"、"page"）"""
+    if not text:
+        return False
+    if not isinstance(text, str):
+        text = str(text)
+    return _PAGE_INDICATOR_RE.search(text) is not None
+
+
+def _reclassify_level(text, current_level):
+    """按行首编号重新判断模块级别，不是模块标题时返回 current_level"""
+    if not text:
+        return current_level
+    
+    first = text[0]
+    # 检查是否是一级模块（汉字编号）
+    if first in _RECLASSIFY_CN_SET:
+        return 1 if _RECLASSIFY_CN_LVL1.match(text) else current_level
+    # 检查是否是二级模块
+    if first in _RECLASSIFY_PAREN_SET:
+        return 2 if _RECLASSIFY_PAREN_LVL2.match(text) else current_level
+    if first.isdecimal():
+        # 检查是否是一级模块（多级数字编号）
+        if _RECLASSIFY_DOTTED_LVL1.match(text):
+            return 1
+        # 检查是否是三级模块
+        if _RECLASSIFY_NUM_LVL3.match(text):
+            return 3
+    return current_level
+
+
+def _extract_digits(text):
+    """提取字符串中的数字，等价于 re.sub(r'[^\d]', '', text)"""
+    return ''.join(c for c in text if c.isdecimal())
+
+
+def _count_digits(text):
+    """统计字符串中的数字个数"""
+    return sum(1 for c in text if c.isdecimal())
+
+
+def _pdfplumber_page_text(page):
+    """用 pdfplumber 提取页面文本，取出文本后立即释放页面的解析缓存"""
+    try:
+        return page.extract_text() or ''
+    finally:
+        # close() 除 flush_cache() 外还清空 get_textmap 的缓存，否则每页的字符映射会一直保留到PDF关闭
+        page.close()
+
+
+def _pdfium_page_text(pdf, index):
+    """用 pypdfium2 提取页面文本，换行统一为 \\n 并去掉空行，与 pdfplumber 的输出形式一致
+
+    调用方须持有 _PDFIUM_LOCK
+    """
+    page = pdf[index]
+    textpage = page.get_textpage()
+    try:
+        text = textpage.get_text_range()
+    finally:
+        textpage.close()
+        page.close()
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line for line in lines if line.strip())
+
+
+def _pdf_page_count(pdf_path):
+    """获取PDF页数"""
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def _iter_pdf_page_texts(pdf_path, page_numbers=None, use_pdfium=False):
+    """按页顺序逐页返回PDF文本，page_numbers 为要提取的页码（从1开始），默认全部页
+
+    默认用 pdfplumber（行按版面位置排序）；use_pdfium 为 True 且已安装 pypdfium2 时改用 PDFium，行按内容流顺序输出
+    """
+    if use_pdfium and pdfium is not None:
+        # 逐次调用加锁，yield 时不持有锁，避免调用方处理文本期间阻塞其他会话
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(pdf_path)
+            page_count = len(pdf)
+        try:
+            indices = range(page_count) if page_numbers is None else [n - 1 for n in page_numbers]
+            for index in indices:
+                with _PDFIUM_LOCK:
+                    text = _pdfium_page_text(pdf, index)
+                yield text
+        finally:
+            with _PDFIUM_LOCK:
+                pdf.close()
+    else:
+        with pdfplumber.open(pdf_path, pages=page_numbers) as pdf:
+            for page in pdf.pages:
+                yield _pdfplumber_page_text(page)
+
+
+# 并行提取的最少页数：spawn 启动一个子进程约 0.8 秒，pdfplumber 每页约 0.025 秒，
+# 2~4 个进程时约 40~60 页才能抵消启动开销，这里留出余量
+_PARALLEL_MIN_PAGES = 100
+
+
+def _extract_pages_text(pdf_path, page_numbers):
+    """提取指定页的文本，在子进程中执行"""
+    return list(_iter_pdf_page_texts(pdf_path, page_numbers))
+
+
+def _extract_pdf_page_texts(pdf_path, max_workers=1, use_pdfium=False):
+    """按页顺序返回PDF各页文本
+
+    默认在当前进程中逐页提取（惰性返回，不会一次持有全部页面文本）；
+    max_workers 大于 1 且使用 pdfplumber、页数不少于 _PARALLEL_MIN_PAGES 时，才把页面分块交给多个进程并行提取。
+    启用 PDFium（use_pdfium）时提取本身已足够快，进程启动开销总是大于收益，不走并行
+    """
+    workers = min(max_workers, os.cpu_count() or 1)
+    if workers <= 1 or use_pdfium:
+        return _iter_pdf_page_texts(pdf_path, use_pdfium=use_pdfium)
+    page_count = _pdf_page_count(pdf_path)
+    if page_count < _PARALLEL_MIN_PAGES:
+        return _iter_pdf_page_texts(pdf_path)
+    
+    chunk_size = -(-page_count // workers)
+    chunks = [list(range(start + 1, min(start + chunk_size, page_count) + 1))
+              for start in range(0, page_count, chunk_size)]
+    texts = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT) as executor:
+        for chunk_texts in executor.map(_extract_pages_text, repeat(pdf_path), chunks):
+            texts.extend(chunk_texts)
+    return texts
+
+
+def _valid_title_match(match_obj):
+    """验证模块匹配是否有效：编号后必须有标题内容"""
+    return match_obj is not None and bool(match_obj.group(2).strip())
+
+
+def _combine_level_regexes(named_regexes):
+    """把各级编号正则合并为一个带命名分组的正则，按给定顺序优先匹配"""
+    parts = [f'(?P<{name}>{regex.pattern})' for name, regex in named_regexes if regex]
+    return re.compile('|'.join(parts)) if parts else None
+
+
+# Word 表格直接读取底层 XML，跳过 python-docx 的 _Cell/Paragraph 包装对象
+_WORD_NS = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
+# 段落中可见文本的元素（含超链接内的文本），str() 转换规则与 Paragraph.text 一致（制表符为 \t，换行为 \n）
+_WORD_PARA_TEXT_XPATH = etree.XPath(
+    '(w:r | w:hyperlink/w:r)/*[self::w:br or self::w:cr or self::w:noBreakHyphen '
+    'or self::w:ptab or self::w:t or self::w:tab]',
+    namespaces=_WORD_NS,
+)
+
+
+def _word_para_text(p):
+    """段落文本，等价于 Paragraph.text"""
+    return ''.join(str(e) for e in _WORD_PARA_TEXT_XPATH(p))
+
+
+def _word_tc_text(tc):
+    """单元格文本，等价于 _Cell.text"""
+    return '\n'.join(_word_para_text(p) for p in tc.p_lst)
+
+
+def _iter_word_row_texts(trs):
+    """按顺序返回表格各行的单元格文本，每行等价于 [cell.text for cell in row.cells]
+
+    横向合并的单元格按所跨列数重复，纵向合并的后续单元格取合并起始单元格的文本。
+    纵向合并直接沿用上一行同一列的文本，不必每行都向上查找合并起始单元格
+    """
+    above = {}
+    for tr in trs:
+        texts = []
+        by_offset = {}
+        offset = tr.grid_before
+        for tc in tr.tc_lst:
+            # cell 为 (文本, 所跨列数)，纵向合并时均取自合并起始单元格
+            if tc.vMerge != 'continue':
+                cell = (_word_tc_text(tc), tc.grid_span)
+            elif offset in above:
+                cell = above[offset]
+            else:
+                # 上一行同一列没有单元格（不规范的表格），按 python-docx 的方式查找
+                origin = tc
+                while origin.vMerge == 'continue':
+                    origin = origin._tc_above
+                cell = (_word_tc_text(origin), origin.grid_span)
+            by_offset[offset] = cell
+            texts.extend([cell[0]] * cell[1])
+            offset += tc.grid_span
+        above = by_offset
+        yield texts
+
+
+# 短于此长度的单元格文本放入去重池（长描述很少重复，不必入池）
+_POOLED_TEXT_MAX_LEN = 256
+
+# 默认表头映射时查找的字段（Word 表头名 -> 字段名）
+_DEFAULT_WORD_FIELDS = (('功能模块', '功能模块'), ('功能子项', '功能子项'), ('三级模块', '三级模块'), ('功能描述', '功能描述'))
+
+
+@functools.lru_cache(maxsize=64)
+def _word_source_info(source_file):
+    """Word 默认映射的来源信息 (来源文件名, 是否标书, 是否合同)，同一文件的每一行都相同，按路径缓存"""
+    source_name = os.path.basename(source_file) if not source_file.endswith('tmp') else '合同.docx'
+    return source_name, "标书" in source_file, "合同" in source_file
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_header(header):
+    """去掉表头中的换行符（包括字面量 "\\n"），表头在各表格间大量重复，按文本缓存
+
+    中文表头上 str.translate 逐字符查表比两次 str.replace 慢，这里保留 replace
+    """
+    return header.replace('\n', '').replace('\\n', '')
+
+
+@functools.lru_cache(maxsize=256)
+def _header_fields(headers, patterns, normalize=False):
+    """按表头匹配字段：每个表头取 patterns 中第一个包含于表头的 (关键字, 字段) 的字段，未匹配为 None
+
+    同一表格各行的表头相同，结果按 (表头, 映射) 缓存，每行只需一次字典查找
+    normalize 为 True 时先去掉表头中的换行符（包括字面量 "\\n"）
+    """
+    fields = []
+    for header in headers:
+        if normalize:
+            header = _normalize_header(header)
+        fields.append(next((field for keyword, field in patterns if keyword in header), None))
+    return tuple(fields)
+
+
+@functools.lru_cache(maxsize=256)
+def _has_matched_keywords(headers, keywords, required, normalize=False):
+    """keywords 中至少有 required 个包含于某个表头时返回 True，按 (表头, 关键字) 缓存
+
+    匹配数达到 required 即提前返回，无需检查剩余关键字
+    normalize 为 True 时先去掉表头中的换行符（包括字面量 "\\n"）
+    """
+    if normalize:
+        headers = [_normalize_header(header) for header in headers]
+    found = 0
+    for keyword in keywords:
+        if any(keyword in header for header in headers):
+            found += 1
+            if found >= required:
+                return True
+    return False
+
+
+# 结果字段名（驻留字符串，所有结果字典共用同一组键对象）
+_ROW_COLS = tuple(sys.intern(col) for col in ('一级模块名称', '二级模块名称', '三级模块名称', '标书描述', '合同描述', '来源文件'))
+
+
+class _ResultRow:
+    """提取结果行，使用 __slots__ 减少结果行的内存占用，返回前再转换为字典"""
+    __slots__ = ('lvl1', 'lvl2', 'lvl3', 'desc', 'source')
+
+    def __init__(self, lvl1, lvl2, lvl3, desc, source):
+        self.lvl1 = lvl1
+        self.lvl2 = lvl2
+        self.lvl3 = lvl3
+        self.desc = desc
+        self.source = source
+
+    def values(self, desc_field: str = '标书描述'):
+        """按 _ROW_COLS 顺序返回各字段值，描述写入 desc_field 指定的字段（标书描述/合同描述），另一描述字段留空"""
+        if desc_field == '合同描述':
+            return self.lvl1, self.lvl2, self.lvl3, '', self.desc, self.source
+        return self.lvl1, self.lvl2, self.lvl3, self.desc, '', self.source
+
+    def to_dict(self, desc_field: str = '标书描述'):
+        return dict(zip(_ROW_COLS, self.values(desc_field)))
+
+
+class _DescBuffer:
+    """描述文本累加器，逐行写入时即合并自然段（空行分段，段内各行直接拼接，段落之间以空行分隔）"""
+    __slots__ = ('_buf', '_has_lines', '_para_break')
+
+    def __init__(self):
+        self._buf = io.StringIO()
+        self._has_lines = False
+        self._para_break = False
+
+    def __bool__(self):
+        # 与原先的行列表一致：写入过任意行（包括空行）即为真
+        return self._has_lines
+
+    def append(self, line):
+        self._has_lines = True
+        line = line.strip()
+        if not line:
+            self._para_break = True
+            return
+        if self._para_break and self._buf.tell():
+            self._buf.write('\n\n')
+        self._para_break = False
+        self._buf.write(line)
+
+    def pop_text(self):
+        """取出合并后的描述文本并清空"""
+        text = self._buf.getvalue()
+        self._buf.seek(0)
+        self._buf.truncate()
+        self._has_lines = False
+        self._para_break = False
+        return text
+
+
+class FuzzyRegex(NamedTuple):
+    """样例生成的编号正则及期望的数字长度"""
+    regex: Pattern
+    expected_digit_length: Optional[int]
+    # 样例中的数字序列，供 smart_start_match 使用
+    sample_digits: str = ''
+    # 标题行首字符约束：lead_digit 表示首字符可以是数字，lead_chars 为其余可能的首字符，
+    # lead_chars 为 None 表示首字符无法确定（不做快速过滤）
+    lead_digit: bool = False
+    lead_chars: Optional[frozenset] = None
+
+
+_PAREN_LEAD = frozenset('（(')
+
+
+def _template_lead(template):
+    """根据模板第一个元素推断编号正则可能的首字符，返回 (lead_digit, lead_chars)"""
+    if not template:
+        return False, None
+    t, val = template[0]
+    if t == 'digit':
+        return True, frozenset()
+    if t == 'cndigit':
+        return False, _CN_NUM_SET
+    if t == 'ch':
+        return False, None
+    # 末尾的 "\." 会被 rstrip 去掉，以 "." 或 "\" 开头时首字符可能不再固定
+    if val in '.\\':
+        return False, None
+    return False, frozenset(val)
+
+
+def _heading_lead(infos):
+    """合并各级样例的首字符约束，任一级无法确定时返回 None"""
+    infos = [info for info in infos if info]
+    if not infos or any(info.lead_chars is None for info in infos):
+        return None
+    return any(info.lead_digit for info in infos), frozenset().union(*(info.lead_chars for info in infos))
+
+
+def _lead_allows(lead, first):
+    """首字符预筛：lead 为 _heading_lead 的结果，为 None 时首字符不确定，不做筛选"""
+    if lead is None:
+        return True
+    lead_digit, lead_chars = lead
+    return first in lead_chars or (lead_digit and first.isdecimal())
 
 def parse_sample_to_template(sample):
     template = []
-    i = 0
-    while i < len(sample):
-        c = sample[i]
-        if c.isdigit():
-            num = c
-            while i+1 < len(sample) and sample[i+1].isdigit():
-                i += 1
-                num += sample[i]
-            template.append(('digit', num))
-        elif c in CN_NUM:
-            cn = c
-            while i+1 < len(sample) and sample[i+1] in CN_NUM:
-                i += 1
-                cn += sample[i]
-            template.append(('cndigit', cn))
-        elif c in '()（）':
-            template.append(('paren', c))
-        elif c in '【】':
-            template.append(('bracket', c))
-        elif c in '.、.':
-            template.append(('sep', c))
-        elif '\u4e00' <= c <= '\u9fa5':
-            word = c
-            while i+1 < len(sample) and '\u4e00' <= sample[i+1] <= '\u9fa5':
-                i += 1
-                word += sample[i]
-            template.append(('ch', word))
+    for digit, cndigit, paren, bracket, sep, ch, other in _TEMPLATE_TOKEN_RE.findall(sample):
+        if digit:
+            template.append(('digit', digit))
+        elif cndigit:
+            template.append(('cndigit', cndigit))
+        elif paren:
+            template.append(('paren', paren))
+        elif bracket:
+            template.append(('bracket', bracket))
+        elif sep:
+            template.append(('sep', sep))
+        elif ch:
+            template.append(('ch', ch))
         else:
-            template.append(('other', c))
-        i += 1
+            template.append(('other', other))
     return template
 
 def template_to_regex(template):
@@ -75,78 +515,63 @@ def template_to_regex(template):
             regex += re.escape(val)
     return regex
 
+@functools.lru_cache(maxsize=128)
 def get_regex_from_sample(sample):
-    """从样例直接获取正则表达式"""
+    """从样例直接获取正则表达式（返回正则字符串，按样例缓存）"""
     template = parse_sample_to_template(sample)
     return template_to_regex(template)
 
+@functools.lru_cache(maxsize=1024)
 def get_fuzzy_regex_from_sample(sample):
     """
     生成更灵活的正则表达式，支持各种编号格式
+    结果按样例缓存，同一样例重复调用直接命中
     """
+    sample_digits = _extract_digits(sample)
+    
     # 匹配"数字.数字.数字."结构（如 9.1.4.3.1.），更灵活
-    if re.match(r'^\d+(\.\d+)+\.?$', sample):
+    if _DISPATCH_DOTTED.match(sample):
         # 返回带分组的正则，编号部分更灵活，支持末尾没有点的情况
         # 新增：记录原始样例的数字长度，用于后续长度检查
-        sample_digits = re.sub(r'[^\d]', '', sample)
-        regex = re.compile(r'^(\d+(?:\.\d+)+[\.\s\u3000．、]*)(.*)$')
-        # 返回字典，包含正则和长度信息
-        return {
-            'regex': regex,
-            'expected_digit_length': len(sample_digits)
-        }
+        return FuzzyRegex(_FUZZY_DOTTED, len(sample_digits), sample_digits, True, frozenset())
     
     # 匹配"数字）"或"数字)"结构（如 1） 或 1) ），支持中英文括号
-    if re.match(r'^\d+[）)]$', sample):
-        return {
-            'regex': re.compile(r'^(\d+[\)\）])(.*)$'),
-            'expected_digit_length': None
-        }
+    if _DISPATCH_NUM_PAREN.match(sample):
+        return FuzzyRegex(_FUZZY_NUM_PAREN, None, sample_digits, True, frozenset())
     
     # 匹配"（数字）"或"(数字)"结构（如 （1） 或 (1) ），支持中英文括号
-    if re.match(r'^[（(]\d+[）)]$', sample):
-        return {
-            'regex': re.compile(r'^([（(]\d+[\)\）])(.*)$'),
-            'expected_digit_length': None
-        }
+    if _DISPATCH_PAREN_NUM.match(sample):
+        return FuzzyRegex(_FUZZY_PAREN_NUM, None, sample_digits, False, _PAREN_LEAD)
     
     # 匹配"（汉字数字）"或"(汉字数字)"结构（如 （十一） 或 (十一) ），支持更多汉字数字
-    if re.match(r'^[（(][零一二三四五六七八九十百千万亿]+[）)]$', sample):
-        return {
-            'regex': re.compile(r'^([（(][零一二三四五六七八九十百千万亿]+[\)\）])(.*)$'),
-            'expected_digit_length': None
-        }
+    if _DISPATCH_PAREN_CN.match(sample):
+        return FuzzyRegex(_FUZZY_PAREN_CN, None, sample_digits, False, _PAREN_LEAD)
     
     # 新增：匹配"数字."结构（如 1.），生成更严格的正则
-    if re.match(r'^\d+\.$', sample):
-        return {
-            'regex': re.compile(r'^(\d+\.)(.*)$'),
-            'expected_digit_length': None
-        }
+    if _DISPATCH_NUM_DOT.match(sample):
+        return FuzzyRegex(_FUZZY_NUM_DOT, None, sample_digits, True, frozenset())
     
     # 其他类型：先去除所有空白字符（包括全角空格），再用模板解析生成正则
-    sample = re.sub(r'[\s\u3000]', '', sample)
+    sample = sample.translate(_WS_DELETE_TABLE)
     template = parse_sample_to_template(sample)
     regex = template_to_regex(template)
     regex = regex.rstrip(r'\.')
     regex += r'[\.\s\u3000．、]*'  # 允许编号后有点、空格、顿号等
-    return {
-        'regex': re.compile(f'^({regex})(.*)$'),
-        'expected_digit_length': None
-    }
+    lead_digit, lead_chars = _template_lead(template)
+    return FuzzyRegex(re.compile(f'^({regex})(.*)$'), None, sample_digits, lead_digit, lead_chars)
 
-def smart_start_match(sample, text, regex):
+def smart_start_match(sample_digits, text, regex):
     """
     智能起始编号匹配，支持多种匹配策略
+    sample_digits 为样例中的数字序列（见 FuzzyRegex.sample_digits），由调用方预先计算
     """
     match = regex.match(text)
     if not match:
         return False, None, None
     
     # 提取数字序列
-    sample_digits = re.sub(r'[^\d]', '', sample)
     text_number_part = match.group(1)
-    text_digits = re.sub(r'[^\d]', '', text_number_part)
+    text_digits = _extract_digits(text_number_part)
     
     # 多种匹配策略
     if sample_digits == text_digits:
@@ -181,6 +606,13 @@ class PDFWordTableExtractor:
         self.current_lvl3 = ""
         self.current_description = []
         self.collected_data = []
+        
+        # 提取PDF文本的进程数，默认 1 即在当前进程中提取；页数很多的PDF可设为 CPU 核数以并行提取
+        self.pdf_workers = 1
+        
+        # 是否用 PDFium 提取PDF文本（需安装 pypdfium2）：速度快得多，但行按内容流顺序输出，
+        # 绘制顺序与阅读顺序不同的PDF会打乱行序，默认关闭
+        self.use_pdfium = False
 
     def extract_tables(self, file_path: str, file_type: str) -> List[Dict]:
         """提取表格数据的主入口"""
@@ -203,8 +635,13 @@ class PDFWordTableExtractor:
             '功能描述': '合同描述'
         }
     
-    def extract_tables_from_pdf_bid(self, pdf_path: str) -> List[Dict]:
-        """提取PDF标书文件中的表格（完整版）"""
+    def extract_tables_from_pdf_bid(self, pdf_path: str,
+                                    as_dataframe: bool = False) -> Union[List[Dict], pd.DataFrame]:
+        """提取PDF标书文件中的表格（完整版）
+
+        提取过程中结果行以元组记录，as_dataframe 为 True 时直接由元组构建 DataFrame，不再构造中间的字典列表
+        注意：as_dataframe 为 True 时不填充 self.collected_data（保持为空列表），结果只通过返回值提供
+        """
         # 清空之前的状态变量
         def clear_previous_state():
             self.current_lvl1 = ""
@@ -215,103 +652,73 @@ class PDFWordTableExtractor:
         
         clear_previous_state()
         
-        def reclassify_module(text, current_level):
-            """重新分类模块"""
-            if not text:
-                return current_level
-            
-            # 检查是否是一级模块
-            if re.match(r'^[一二三四五六七八九十]+、', text) or re.match(r'^\d+\.\d+\.\d+\.\d+', text):
-                return 1
-            # 检查是否是二级模块
-            elif re.match(r'^[（(][一二三四五六七八九十]+[）)]', text) or re.match(r'^\d+\.\d+\.\d+\.\d+\.\d+', text):
-                return 2
-            # 检查是否是三级模块
-            elif re.match(r'^\d+[、）)]', text) or re.match(r'^\d+\.\d+\.\d+\.\d+\.\d+\.\d+', text):
-                return 3
-            else:
-                return current_level
-        
-        def should_enable_verification():
-            """是否启用验证"""
-            return True
-        
-        def is_page_number(text):
-            """检查是否为页码"""
-            if not text:
-                return False
-            page_indicators = ['第', '页', 'Page', 'page']
-            return any(indicator in str(text) for indicator in page_indicators)
-        
-        data = []
+        # 结果行 (一级, 二级, 三级, 标书描述, 合同描述, 来源文件)，字段顺序同 _ROW_COLS
+        rows = []
+        source_name = os.path.basename(pdf_path)
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    text = page.extract_text()
-                    if not text:
+            # 各页文本提取相互独立，可按 self.pdf_workers 并行；层级状态依赖页序，在下面按顺序处理
+            for page_text in _extract_pdf_page_texts(pdf_path, self.pdf_workers, self.use_pdfium):
+                current_level = 0
+                
+                for line in page_text.split('\n'):
+                    line = line.strip()
+                    if not line or _is_page_content(line):
                         continue
                     
-                    lines = text.split('\n')
-                    current_level = 0
-                    
-                    for line in lines:
-                        line = line.strip()
-                        if not line or is_page_number(line):
-                            continue
+                    # 重新分类模块
+                    new_level = _reclassify_level(line, current_level)
+                    if new_level != current_level:
+                        # 保存之前的数据
+                        if self.current_description and (self.current_lvl1 or self.current_lvl2 or self.current_lvl3):
+                            rows.append((
+                                self.current_lvl1, self.current_lvl2, self.current_lvl3,
+                                ' '.join(self.current_description), '', source_name
+                            ))
                         
-                        # 重新分类模块
-                        new_level = reclassify_module(line, current_level)
-                        if new_level != current_level:
-                            # 保存之前的数据
-                            if self.current_description and (self.current_lvl1 or self.current_lvl2 or self.current_lvl3):
-                                self.collected_data.append({
-                                    '一级模块名称': self.current_lvl1,
-                                    '二级模块名称': self.current_lvl2,
-                                    '三级模块名称': self.current_lvl3,
-                                    '标书描述': ' '.join(self.current_description),
-                                    '合同描述': '',
-                                    '来源文件': os.path.basename(pdf_path)
-                                })
-                            
-                            # 更新当前级别
-                            current_level = new_level
-                            self.current_description = []
-                            
-                            if current_level == 1:
-                                self.current_lvl1 = line
-                                self.current_lvl2 = ""
-                                self.current_lvl3 = ""
-                            elif current_level == 2:
-                                self.current_lvl2 = line
-                                self.current_lvl3 = ""
-                            elif current_level == 3:
-                                self.current_lvl3 = line
-                        else:
-                            # 收集描述
-                            if current_level > 0:
-                                self.current_description.append(line)
-                    
-                    # 处理页面末尾的数据
-                    if self.current_description and (self.current_lvl1 or self.current_lvl2 or self.current_lvl3):
-                        self.collected_data.append({
-                            '一级模块名称': self.current_lvl1,
-                            '二级模块名称': self.current_lvl2,
-                            '三级模块名称': self.current_lvl3,
-                            '标书描述': ' '.join(self.current_description),
-                            '合同描述': '',
-                            '来源文件': os.path.basename(pdf_path)
-                        })
+                        # 更新当前级别
+                        current_level = new_level
                         self.current_description = []
-        
+                        
+                        if current_level == 1:
+                            self.current_lvl1 = line
+                            self.current_lvl2 = ""
+                            self.current_lvl3 = ""
+                        elif current_level == 2:
+                            self.current_lvl2 = line
+                            self.current_lvl3 = ""
+                        elif current_level == 3:
+                            self.current_lvl3 = line
+                    else:
+                        # 收集描述
+                        if current_level > 0:
+                            self.current_description.append(line)
+                
+                # 处理页面末尾的数据
+                if self.current_description and (self.current_lvl1 or self.current_lvl2 or self.current_lvl3):
+                    rows.append((
+                        self.current_lvl1, self.current_lvl2, self.current_lvl3,
+                        ' '.join(self.current_description), '', source_name
+                    ))
+                    self.current_description = []
+    
         except Exception as e:
             logger.error(f"PDF处理错误: {e}")
         
+        if as_dataframe:
+            # 不构造字典列表，self.collected_data 保持 clear_previous_state() 设置的空列表
+            return pd.DataFrame.from_records(rows, columns=list(_ROW_COLS))
+        self.collected_data = [dict(zip(_ROW_COLS, row)) for row in rows]
         return self.collected_data
 
     def extract_tables_from_pdf_bid_with_samples(self, pdf_path: str, lvl1_sample: str, 
                                                lvl2_sample: str = "", lvl3_sample: str = "", 
-                                               end_sample: str = "") -> List[Dict]:
-        """使用编号样例提取PDF标书 - 严格按照本地版逻辑"""
+                                               end_sample: str = "", desc_field: str = '标书描述',
+                                               as_dataframe: bool = False) -> Union[List[Dict], pd.DataFrame]:
+        """使用编号样例提取PDF标书 - 严格按照本地版逻辑
+
+        desc_field 指定描述文本写入的字段，合同提取时传入 '合同描述'
+        as_dataframe 为 True 时直接返回 DataFrame，不再构造中间的字典列表
+        """
         
         # 获取正则表达式
         lvl1_regex_info = get_fuzzy_regex_from_sample(lvl1_sample) if lvl1_sample else None
@@ -319,15 +726,23 @@ class PDFWordTableExtractor:
         lvl3_regex_info = get_fuzzy_regex_from_sample(lvl3_sample) if lvl3_sample else None
         end_regex_info = get_fuzzy_regex_from_sample(end_sample) if end_sample else None
 
-        lvl1_regex = lvl1_regex_info['regex'] if lvl1_regex_info else None
-        lvl2_regex = lvl2_regex_info['regex'] if lvl2_regex_info else None
-        lvl3_regex = lvl3_regex_info['regex'] if lvl3_regex_info else None
-        end_regex = end_regex_info['regex'] if end_regex_info else None
+        lvl1_regex = lvl1_regex_info.regex if lvl1_regex_info else None
+        lvl2_regex = lvl2_regex_info.regex if lvl2_regex_info else None
+        lvl3_regex = lvl3_regex_info.regex if lvl3_regex_info else None
+        end_regex = end_regex_info.regex if end_regex_info else None
+
+        # 三级、二级、一级合并为一个正则，每行只需匹配一次即可判断是否为模块标题
+        level_regex = _combine_level_regexes([('lvl3', lvl3_regex), ('lvl2', lvl2_regex), ('lvl1', lvl1_regex)])
+        # 标题行首字符只可能是数字、括号等少数字符，首字符不符时无需进行正则匹配
+        heading_lead = _heading_lead([lvl1_regex_info, lvl2_regex_info, lvl3_regex_info])
+        # 起始、终止编号同样按首字符预筛，绝大多数正文行无需进入正则匹配
+        lvl1_lead = _heading_lead([lvl1_regex_info])
+        end_lead = _heading_lead([end_regex_info])
 
         results = []
         current_lvl1 = current_lvl2 = current_lvl3 = None
         last_lvl1 = last_lvl2 = last_lvl3 = None
-        desc_lines = []
+        desc_buf = _DescBuffer()
         extracting = False
         start_found = False
         in_lvl3 = False
@@ -341,352 +756,218 @@ class PDFWordTableExtractor:
         # 判断是否有三级模块样例
         has_lvl3_sample = bool(lvl3_sample)
 
-        def is_page_number(text):
-            """判断是否为页码信息"""
-            page_patterns = [
-                r'^第\d+页$',
-                r'^Page\s*\d+$',
-                r'^-\s*\d+\s*-$',
-            ]
-            # 更严格的纯数字页码判断
-            if re.match(r'^\d+$', text.strip()):
-                # 如果数字小于等于3位数，且前后没有其他内容，可能是页码
-                if len(text.strip()) <= 3:
-                    return True
-            return any(re.match(pattern, text.strip()) for pattern in page_patterns)
+        source_name = os.path.basename(pdf_path)
 
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    lines = (page.extract_text() or '').split('\n')
-                    for raw_text in lines:
-                        # 处理原始文本
-                        text = re.sub(r'[\s\u3000]', '', raw_text)
-
-                        # 终止编号判断
-                        if end_regex and end_regex.match(text):
-                            is_match, match_type, actual_digits = smart_start_match(end_sample, text, end_regex)
-                            if is_match:
-                                extracting = False
-                                in_lvl3 = False
-                                in_lvl2 = False
-                                continue
+            for page_text in _iter_pdf_page_texts(pdf_path, use_pdfium=self.use_pdfium):
+                for raw_text in page_text.split('\n'):
+                    # 处理原始文本
+                    stripped = raw_text.strip()
+                    text = raw_text.translate(_WS_DELETE_TABLE)
+                    first = text[:1]
 
-                        # 智能起始编号判断
-                        if not extracting and lvl1_sample and lvl1_regex and lvl1_regex.match(text):
-                            is_match, match_type, actual_digits = smart_start_match(lvl1_sample, text, lvl1_regex)
-                            if is_match:
-                                extracting = True
-                                start_found = True
-                                current_lvl1 = raw_text.strip()
-                                lvl1_filled = False
-                                lvl1_to_fill = current_lvl1
-                                lvl2_to_fill = current_lvl2 if current_lvl2 else ""
-                                in_lvl2 = False
-                                continue
+                    # 终止编号判断（smart_start_match 内部完成正则匹配，未匹配时返回 False）
+                    if end_regex and _lead_allows(end_lead, first):
+                        is_match, match_type, actual_digits = smart_start_match(end_regex_info.sample_digits, text, end_regex)
+                        if is_match:
+                            extracting = False
+                            in_lvl3 = False
+                            in_lvl2 = False
+                            continue
 
-                        if not extracting:
+                    # 智能起始编号判断
+                    if not extracting and lvl1_sample and lvl1_regex and _lead_allows(lvl1_lead, first):
+                        is_match, match_type, actual_digits = smart_start_match(lvl1_regex_info.sample_digits, text, lvl1_regex)
+                        if is_match:
+                            extracting = True
+                            start_found = True
+                            current_lvl1 = stripped
+                            lvl1_filled = False
+                            lvl1_to_fill = current_lvl1
+                            lvl2_to_fill = current_lvl2 if current_lvl2 else ""
+                            in_lvl2 = False
                             continue
 
-                        # 先判断三级
-                        m3 = lvl3_regex.match(text) if lvl3_regex else None
-                        if m3:
-                            # 验证三级模块匹配的有效性
-                            def is_valid_lvl3_match(match_obj, original_text):
-                                """验证三级模块匹配是否有效"""
-                                if not match_obj:
-                                    return False
-                                
-                                # 提取匹配的编号部分
-                                number_part = match_obj.group(1)
-                                title_part = match_obj.group(2).strip()
-                                
-                                # 检查标题部分是否有内容
-                                if not title_part:
-                                    return False
-                                
-                                return True
-                            
-                            # 验证匹配有效性
-                            if not is_valid_lvl3_match(m3, raw_text.strip()):
+                    if not extracting:
+                        continue
+
+                    # 合并正则按三级、二级、一级的顺序匹配，lastgroup 即第一个匹配的级别
+                    heading = level_regex.match(text) if level_regex and _lead_allows(heading_lead, first) else None
+                    first_level = heading.lastgroup if heading else None
+
+                    # 先判断三级
+                    m3 = lvl3_regex.match(text) if first_level == 'lvl3' else None
+                    if m3:
+                        # 验证匹配有效性
+                        if not _valid_title_match(m3):
+                            m3 = None
+                        
+                        if lvl3_regex_info and lvl3_regex_info.expected_digit_length:
+                            if _count_digits(m3.group(1)) != lvl3_regex_info.expected_digit_length:
                                 m3 = None
-                            
-                            if lvl3_regex_info and lvl3_regex_info['expected_digit_length']:
-                                text_digits = re.sub(r'[^\d]', '', m3.group(1))
-                                if len(text_digits) != lvl3_regex_info['expected_digit_length']:
-                                    m3 = None
-
-                            if m3:
-                                # 遇到新三级编号时，先输出上一组（如果有描述）
-                                if in_lvl3 and desc_lines:
-                                    results.append({
-                                        "一级模块名称": lvl1_to_fill,
-                                        "二级模块名称": lvl2_to_fill,
-                                        "三级模块名称": last_lvl3,
-                                        "标书描述": '\n\n'.join(self._merge_paragraphs(desc_lines)).strip(),
-                                        "合同描述": "",
-                                        "来源文件": os.path.basename(pdf_path)
-                                    })
-                                    desc_lines = []
-                                    lvl1_filled = True
-                                    lvl2_filled = True
 
-                                number = m3.group(1)
-                                title = m3.group(2).strip()
-                                current_lvl3 = f"{number} {title}".strip()
-                                last_lvl3 = current_lvl3
-                                in_lvl3 = True
-                                in_lvl2 = False
-                                lvl1_to_fill = current_lvl1 if not lvl1_filled else ""
-                                lvl2_to_fill = current_lvl2 if not lvl2_filled else ""
-                                continue
+                        if m3:
+                            # 遇到新三级编号时，先输出上一组（如果有描述）
+                            if in_lvl3 and desc_buf:
+                                self._emit(results, lvl1_to_fill, lvl2_to_fill, last_lvl3, desc_buf, source_name)
+                                lvl1_filled = True
+                                lvl2_filled = True
 
-                        # 再判断二级
-                        m2 = lvl2_regex.match(text) if lvl2_regex else None
-                        if m2:
-                            # 验证二级模块匹配的有效性
-                            def is_valid_lvl2_match(match_obj, original_text):
-                                """验证二级模块匹配是否有效"""
-                                if not match_obj:
-                                    return False
-                                
-                                # 提取匹配的编号部分
-                                number_part = match_obj.group(1)
-                                title_part = match_obj.group(2).strip()
-                                
-                                # 检查标题部分是否有内容
-                                if not title_part:
-                                    return False
-                                
-                                return True
-                            
-                            # 验证二级模块匹配有效性
-                            if not is_valid_lvl2_match(m2, raw_text.strip()):
+                            number = m3.group(1)
+                            title = m3.group(2).strip()
+                            current_lvl3 = f"{number} {title}".strip()
+                            last_lvl3 = current_lvl3
+                            in_lvl3 = True
+                            in_lvl2 = False
+                            lvl1_to_fill = current_lvl1 if not lvl1_filled else ""
+                            lvl2_to_fill = current_lvl2 if not lvl2_filled else ""
+                            continue
+
+                    # 再判断二级
+                    m2 = lvl2_regex.match(text) if lvl2_regex and first_level in ('lvl3', 'lvl2') else None
+                    if m2:
+                        # 验证二级模块匹配有效性
+                        if not _valid_title_match(m2):
+                            m2 = None
+                        
+                        if lvl2_regex_info and lvl2_regex_info.expected_digit_length:
+                            if _count_digits(m2.group(1)) != lvl2_regex_info.expected_digit_length:
                                 m2 = None
-                            
-                            if lvl2_regex_info and lvl2_regex_info['expected_digit_length']:
-                                text_digits = re.sub(r'[^\d]', '', m2.group(1))
-                                if len(text_digits) != lvl2_regex_info['expected_digit_length']:
-                                    m2 = None
-                            
-                            if m2:
-                                # 根据是否有三级模块使用不同逻辑
-                                if has_lvl3_sample:
-                                    # 有三级模块样例：使用老代码逻辑
-                                    if in_lvl3 and desc_lines:
-                                        results.append({
-                                            "一级模块名称": lvl1_to_fill,
-                                            "二级模块名称": lvl2_to_fill,
-                                            "三级模块名称": last_lvl3,
-                                            "标书描述": '\n\n'.join(self._merge_paragraphs(desc_lines)).strip(),
-                                            "合同描述": "",
-                                            "来源文件": os.path.basename(pdf_path)
-                                        })
-                                        desc_lines = []
-                                        lvl1_filled = True
-                                        lvl2_filled = True
-                                        in_lvl3 = False
-
-                                    number = m2.group(1)
-                                    title = m2.group(2).strip()
-                                    current_lvl2 = f"{number} {title}".strip()
-                                    current_lvl3 = None
-                                    last_lvl2 = current_lvl2
-                                    lvl2_filled = False
-                                    in_lvl2 = True
-                                    in_lvl3 = False
-                                    
-                                    # 更新填充值
-                                    lvl1_to_fill = current_lvl1 if not lvl1_filled else ""
-                                    lvl2_to_fill = current_lvl2
-                                    continue
-                                else:
-                                    # 没有三级模块样例：使用新代码逻辑
-                                    # 如果之前有描述内容，先输出上一组
-                                    if desc_lines and in_lvl2 and last_lvl2:
-                                        results.append({
-                                            "一级模块名称": lvl1_to_fill,
-                                            "二级模块名称": last_lvl2,  # 使用上一个二级模块名称
-                                            "三级模块名称": "",
-                                            "标书描述": '\n\n'.join(self._merge_paragraphs(desc_lines)).strip(),
-                                            "合同描述": "",
-                                            "来源文件": os.path.basename(pdf_path)
-                                        })
-                                        desc_lines = []
-                                        lvl1_filled = True
-                                        lvl2_filled = True
-                                    
-                                    # 更新当前二级模块
-                                    number = m2.group(1)
-                                    title = m2.group(2).strip()
-                                    current_lvl2 = f"{number} {title}".strip()
-                                    current_lvl3 = None
-                                    last_lvl2 = current_lvl2
-                                    lvl2_filled = False
-                                    in_lvl2 = True
+                        
+                        if m2:
+                            # 根据是否有三级模块使用不同逻辑
+                            if has_lvl3_sample:
+                                # 有三级模块样例：使用老代码逻辑
+                                if in_lvl3 and desc_buf:
+                                    self._emit(results, lvl1_to_fill, lvl2_to_fill, last_lvl3, desc_buf, source_name)
+                                    lvl1_filled = True
+                                    lvl2_filled = True
                                     in_lvl3 = False
-                                    
-                                    # 更新填充值
-                                    lvl1_to_fill = current_lvl1 if not lvl1_filled else ""
-                                    lvl2_to_fill = current_lvl2
-                                    continue
-
-                        # 最后判断一级
-                        m1 = lvl1_regex.match(text) if lvl1_regex else None
-                        if m1:
-                            # 验证一级模块匹配的有效性
-                            def is_valid_lvl1_match(match_obj, original_text):
-                                """验证一级模块匹配是否有效"""
-                                if not match_obj:
-                                    return False
-                                
-                                # 提取匹配的编号部分
-                                number_part = match_obj.group(1)
-                                title_part = match_obj.group(2).strip()
+
+                                number = m2.group(1)
+                                title = m2.group(2).strip()
+                                current_lvl2 = f"{number} {title}".strip()
+                                current_lvl3 = None
+                                last_lvl2 = current_lvl2
+                                lvl2_filled = False
+                                in_lvl2 = True
+                                in_lvl3 = False
                                 
-                                # 检查标题部分是否有内容
-                                if not title_part:
-                                    return False
+                                # 更新填充值
+                                lvl1_to_fill = current_lvl1 if not lvl1_filled else ""
+                                lvl2_to_fill = current_lvl2
+                                continue
+                            else:
+                                # 没有三级模块样例：使用新代码逻辑
+                                # 如果之前有描述内容，先输出上一组
+                                if desc_buf and in_lvl2 and last_lvl2:
+                                    self._emit(results, lvl1_to_fill, last_lvl2, "", desc_buf, source_name)  # 使用上一个二级模块名称
+                                    lvl1_filled = True
+                                    lvl2_filled = True
                                 
-                                return True
-                            
-                            # 验证一级模块匹配有效性
-                            if not is_valid_lvl1_match(m1, raw_text.strip()):
-                                m1 = None
-                            
-                            if lvl1_regex_info and lvl1_regex_info['expected_digit_length']:
-                                text_digits = re.sub(r'[^\d]', '', m1.group(1))
-                                if len(text_digits) != lvl1_regex_info['expected_digit_length']:
-                                    m1 = None
-                            
-                            if m1:
-                                # 根据是否有三级模块使用不同逻辑
-                                if has_lvl3_sample:
-                                    # 有三级模块样例：使用老代码逻辑
-                                    if in_lvl3 and desc_lines:
-                                        results.append({
-                                            "一级模块名称": lvl1_to_fill,
-                                            "二级模块名称": lvl2_to_fill,
-                                            "三级模块名称": last_lvl3,
-                                            "标书描述": '\n\n'.join(self._merge_paragraphs(desc_lines)).strip(),
-                                            "合同描述": "",
-                                            "来源文件": os.path.basename(pdf_path)
-                                        })
-                                        desc_lines = []
-                                        lvl1_filled = True
-                                        lvl2_filled = True
-                                        in_lvl3 = False
-                                else:
-                                    # 没有三级模块样例：使用新代码逻辑
-                                    if desc_lines and not in_lvl3:
-                                        results.append({
-                                            "一级模块名称": lvl1_to_fill,
-                                            "二级模块名称": lvl2_to_fill,
-                                            "三级模块名称": "",
-                                            "标书描述": '\n\n'.join(self._merge_paragraphs(desc_lines)).strip(),
-                                            "合同描述": "",
-                                            "来源文件": os.path.basename(pdf_path)
-                                        })
-                                        desc_lines = []
-                                        lvl1_filled = True
-                                        lvl2_filled = True
-
-                                    if in_lvl3 and desc_lines:
-                                        results.append({
-                                            "一级模块名称": lvl1_to_fill,
-                                            "二级模块名称": lvl2_to_fill,
-                                            "三级模块名称": last_lvl3,
-                                            "标书描述": '\n\n'.join(self._merge_paragraphs(desc_lines)).strip(),
-                                            "合同描述": "",
-                                            "来源文件": os.path.basename(pdf_path)
-                                        })
-                                        desc_lines = []
-                                        lvl1_filled = True
-                                        lvl2_filled = True
-                                        in_lvl3 = False
-
-                                number = m1.group(1)
-                                title = m1.group(2).strip()
-                                current_lvl1 = f"{number} {title}".strip()
-                                current_lvl2 = current_lvl3 = None
-                                last_lvl1 = current_lvl1
-                                lvl1_filled = False
+                                # 更新当前二级模块
+                                number = m2.group(1)
+                                title = m2.group(2).strip()
+                                current_lvl2 = f"{number} {title}".strip()
+                                current_lvl3 = None
+                                last_lvl2 = current_lvl2
                                 lvl2_filled = False
-                                in_lvl2 = False
+                                in_lvl2 = True
                                 in_lvl3 = False
-                                lvl1_to_fill = current_lvl1
-                                lvl2_to_fill = current_lvl2 if current_lvl2 else ""
+                                
+                                # 更新填充值
+                                lvl1_to_fill = current_lvl1 if not lvl1_filled else ""
+                                lvl2_to_fill = current_lvl2
                                 continue
 
-                        # 修改后的收集逻辑 - 严格按照本地版
-                        if extracting:
-                            # 更严格的描述收集验证
-                            def should_collect_description():
-                                """判断是否应该收集描述内容"""
-                                # 如果有三级模块样例
-                                if has_lvl3_sample:
-                                    # 只有在三级模块下才收集
-                                    return in_lvl3
-                                else:
-                                    # 没有三级模块样例时
-                                    if in_lvl2:
-                                        return True
-                                    return False
-                            
-                            # 只有在应该收集的情况下才添加描述
-                            if should_collect_description():
-                                # 额外验证：确保不是模块标题行
-                                if not (lvl1_regex and lvl1_regex.match(text)) and \
-                                   not (lvl2_regex and lvl2_regex.match(text)) and \
-                                   not (lvl3_regex and lvl3_regex.match(text)):
-                                    desc_lines.append(raw_text.strip())
+                    # 最后判断一级
+                    m1 = lvl1_regex.match(text) if lvl1_regex and first_level else None
+                    if m1:
+                        # 验证一级模块匹配有效性
+                        if not _valid_title_match(m1):
+                            m1 = None
+                        
+                        if lvl1_regex_info and lvl1_regex_info.expected_digit_length:
+                            if _count_digits(m1.group(1)) != lvl1_regex_info.expected_digit_length:
+                                m1 = None
+                        
+                        if m1:
+                            # 根据是否有三级模块使用不同逻辑
+                            if has_lvl3_sample:
+                                # 有三级模块样例：使用老代码逻辑
+                                if in_lvl3 and desc_buf:
+                                    self._emit(results, lvl1_to_fill, lvl2_to_fill, last_lvl3, desc_buf, source_name)
+                                    lvl1_filled = True
+                                    lvl2_filled = True
+                                    in_lvl3 = False
+                            else:
+                                # 没有三级模块样例：使用新代码逻辑
+                                if desc_buf and not in_lvl3:
+                                    self._emit(results, lvl1_to_fill, lvl2_to_fill, "", desc_buf, source_name)
+                                    lvl1_filled = True
+                                    lvl2_filled = True
+
+                                if in_lvl3 and desc_buf:
+                                    self._emit(results, lvl1_to_fill, lvl2_to_fill, last_lvl3, desc_buf, source_name)
+                                    lvl1_filled = True
+                                    lvl2_filled = True
+                                    in_lvl3 = False
+
+                            number = m1.group(1)
+                            title = m1.group(2).strip()
+                            current_lvl1 = f"{number} {title}".strip()
+                            current_lvl2 = current_lvl3 = None
+                            last_lvl1 = current_lvl1
+                            lvl1_filled = False
+                            lvl2_filled = False
+                            in_lvl2 = False
+                            in_lvl3 = False
+                            lvl1_to_fill = current_lvl1
+                            lvl2_to_fill = current_lvl2 if current_lvl2 else ""
+                            continue
+
+                    # 修改后的收集逻辑 - 严格按照本地版
+                    if extracting:
+                        # 只有在应该收集的情况下才添加描述
+                        if self._should_collect(has_lvl3_sample, in_lvl2, in_lvl3):
+                            # 额外验证：确保不是模块标题行
+                            if not heading:
+                                desc_buf.append(stripped)
 
             # 补充最后一组
-            if in_lvl3 and desc_lines:
-                results.append({
-                    "一级模块名称": lvl1_to_fill,
-                    "二级模块名称": lvl2_to_fill,
-                    "三级模块名称": last_lvl3,
-                    "标书描述": '\n\n'.join(self._merge_paragraphs(desc_lines)).strip(),
-                    "合同描述": "",
-                    "来源文件": os.path.basename(pdf_path)
-                })
-            elif desc_lines:  # 如果没有三级模块但有描述内容
+            if in_lvl3 and desc_buf:
+                self._emit(results, lvl1_to_fill, lvl2_to_fill, last_lvl3, desc_buf, source_name)
+            elif desc_buf:  # 如果没有三级模块但有描述内容
                 # 确保有正确的二级模块名称
                 final_lvl2 = last_lvl2 if last_lvl2 else current_lvl2 if current_lvl2 else lvl2_to_fill
-                results.append({
-                    "一级模块名称": current_lvl1 if current_lvl1 else lvl1_to_fill,
-                    "二级模块名称": final_lvl2,
-                    "三级模块名称": "",
-                    "标书描述": '\n\n'.join(self._merge_paragraphs(desc_lines)).strip(),
-                    "合同描述": "",
-                    "来源文件": os.path.basename(pdf_path)
-                })
+                self._emit(results, current_lvl1 if current_lvl1 else lvl1_to_fill, final_lvl2, "", desc_buf, source_name)
 
             # 清理数据
-            results = [r for r in results if any([r["一级模块名称"], r["二级模块名称"], r["三级模块名称"], r["标书描述"]])]
+            results = [r for r in results if r.lvl1 or r.lvl2 or r.lvl3 or r.desc]
             
         except Exception as e:
             logger.error(f"PDF处理错误: {e}")
         
-        return results
+        if as_dataframe:
+            return pd.DataFrame.from_records((row.values(desc_field) for row in results), columns=list(_ROW_COLS))
+        return [row.to_dict(desc_field) for row in results]
 
     def extract_tables_from_pdf_contract_with_samples(self, pdf_path: str, lvl1_sample: str, 
                                                     lvl2_sample: str = "", lvl3_sample: str = "", 
-                                                    end_sample: str = "") -> List[Dict]:
+                                                    end_sample: str = "",
+                                                    as_dataframe: bool = False) -> Union[List[Dict], pd.DataFrame]:
         """使用编号样例提取PDF合同"""
-        data = self.extract_tables_from_pdf_bid_with_samples(pdf_path, lvl1_sample, lvl2_sample, lvl3_sample, end_sample)
-        
-        # 调整描述字段映射
-        for item in data:
-            if item['标书描述']:
-                item['合同描述'] = item['标书描述']
-                item['标书描述'] = ''
-        
-        return data
+        # 描述直接写入合同描述字段
+        return self.extract_tables_from_pdf_bid_with_samples(pdf_path, lvl1_sample, lvl2_sample, lvl3_sample,
+                                                             end_sample, desc_field='合同描述',
+                                                             as_dataframe=as_dataframe)
     
-    def extract_tables_from_word_contract(self, docx_path: str, original_filename: str = None) -> List[Dict]:
-        """提取Word合同文件中的表格（完整版）"""
+    def extract_tables_from_word_contract(self, docx_path: str, original_filename: str = None,
+                                          desc_field: str = '合同描述') -> List[Dict]:
+        """提取Word合同文件中的表格（完整版）
+
+        desc_field 指定合同内容写入的描述字段，提取标书时传入 '标书描述'
+        """
         data = []
         found_quotation_section = False
         current_headers = None
@@ -697,154 +978,121 @@ class PDFWordTableExtractor:
             original_filename = os.path.basename(docx_path)
         
         # 先检查整个文档是否包含分项报价表
-        has_quotation_table = False
-        for para in doc.paragraphs:
-            if "分项报价表" in para.text:
-                has_quotation_table = True
-                break
+        has_quotation_table = any("分项报价表" in _word_para_text(p) for p in doc.element.body.p_lst)
         
         if not has_quotation_table:
             return data
         
+        # 已输出的最后一个非空一级/二级模块名称
+        last_lvl1 = ""
+        last_lvl2 = ""
+        # 单元格文本去重池
+        string_pool = {}
+        
         # 处理所有表格
         for table_idx, table in enumerate(doc.tables):
-            rows = list(table.rows)
+            rows = table._tbl.tr_lst
             if not rows:
                 continue
             
             # 检查表头
-            headers = [cell.text.strip().replace('\n', '') for cell in rows[0].cells]
+            row_texts = _iter_word_row_texts(rows)
+            header_texts = next(row_texts)
+            headers = [text.strip().replace('\n', '') for text in header_texts]
             
             # 检查是否是目标表格
             if self._is_target_table_custom(headers):
                 current_headers = headers
                 found_quotation_section = True
                 start_row = 1
-                print(f"✅ 找到匹配的表格，表头：{headers}")
+                logger.debug("✅ 找到匹配的表格，表头：%s", headers)
             elif current_headers and found_quotation_section:
                 start_row = 0
+                # 续表没有表头，第一行也是数据行
+                row_texts = chain([header_texts], row_texts)
             else:
                 continue
                 
             # 处理数据行
-            for row_idx, row in enumerate(rows[start_row:], start=start_row):
+            for row_idx, cells in enumerate(row_texts, start=start_row):
                 row_data = {}
-                cells = row.cells
                 
                 # 处理合并单元格的情况
                 for idx, header in enumerate(current_headers):
                     if idx < len(cells):
-                        cell_text = cells[idx].text.strip()
+                        cell_text = cells[idx].strip()
+                        # 模块名称等短文本在各行大量重复，共用同一个字符串对象
+                        if len(cell_text) < _POOLED_TEXT_MAX_LEN:
+                            cell_text = string_pool.setdefault(cell_text, cell_text)
                         row_data[header] = cell_text
                     else:
                         row_data[header] = ''
                 
-                # 检查是否有有效数据
-                has_data = False
-                
-                # 检查序号字段
-                for header in current_headers:
-                    if '序号' in header and row_data.get(header, '').strip():
-                        try:
-                            int(row_data[header])
-                            has_data = True
-                            break
-                        except ValueError:
-                            pass
-                
-                # 如果序号不是数字，检查其他关键字段
-                if not has_data:
-                    key_fields = self._get_key_fields_for_check()
-                    for field in key_fields:
-                        for header in current_headers:
-                            if field in header and row_data.get(header, '').strip():
-                                has_data = True
-                                break
-                        if has_data:
-                            break
-                
-                # 如果关键字段都没有，再检查其他字段
-                if not has_data:
-                    has_data = any(row_data.get(header, '').strip() for header in current_headers)
+                # 检查是否有有效数据：单元格文本已去除首尾空白，任一字段非空即为有效行
+                # （序号为数字、关键字段非空的情况都包含在内，无需逐项检查）
+                has_data = any(row_data.values())
                 
                 # 添加调试信息
                 if has_data:
-                    mapped = self._map_word_row_custom(row_data, docx_path, original_filename)
+                    mapped = self._map_word_row_custom(row_data, docx_path, original_filename, desc_field)
                     
-                    # 检查重复并处理
-                    if len(data) > 0:
-                        # 查找上一个非空的一级模块名称
-                        last_lvl1 = ""
-                        last_lvl2 = ""
-                        for i in range(len(data) - 1, -1, -1):
-                            if data[i]['一级模块名称'].strip():
-                                last_lvl1 = data[i]['一级模块名称']
-                                break
-                        for i in range(len(data) - 1, -1, -1):
-                            if data[i]['二级模块名称'].strip():
-                                last_lvl2 = data[i]['二级模块名称']
-                                break
-                        
-                        # 检查一级模块名称是否重复
-                        if mapped['一级模块名称'].strip() == last_lvl1.strip() and mapped['一级模块名称'].strip():
-                            # 如果一级模块名称重复，清空当前的一级模块名称
-                            mapped['一级模块名称'] = ""
-                        
-                        # 检查二级模块名称是否重复
-                        if mapped['二级模块名称'].strip() == last_lvl2.strip() and mapped['二级模块名称'].strip():
-                            # 如果二级模块名称重复，清空当前的二级模块名称
-                            mapped['二级模块名称'] = ""
+                    # 检查重复并处理（与上一个非空的一级/二级模块名称比较）
+                    # 检查一级模块名称是否重复
+                    if mapped['一级模块名称'].strip() == last_lvl1.strip() and mapped['一级模块名称'].strip():
+                        # 如果一级模块名称重复，清空当前的一级模块名称
+                        mapped['一级模块名称'] = ""
+                    
+                    # 检查二级模块名称是否重复
+                    if mapped['二级模块名称'].strip() == last_lvl2.strip() and mapped['二级模块名称'].strip():
+                        # 如果二级模块名称重复，清空当前的二级模块名称
+                        mapped['二级模块名称'] = ""
                     
                     data.append(mapped)
+                    if mapped['一级模块名称'].strip():
+                        last_lvl1 = mapped['一级模块名称']
+                    if mapped['二级模块名称'].strip():
+                        last_lvl2 = mapped['二级模块名称']
         
         return data
 
     def extract_tables_from_word_bid(self, docx_path: str) -> List[Dict]:
         """提取Word标书文件中的表格"""
-        data = self.extract_tables_from_word_contract(docx_path)
-        
-        # 调整描述字段映射
-        for item in data:
-            if item['合同描述']:
-                item['标书描述'] = item['合同描述']
-                item['合同描述'] = ''
+        # 描述直接写入标书描述字段
+        return self.extract_tables_from_word_contract(docx_path, desc_field='标书描述')
+    
+    def extract_many(self, paths: List[str], max_workers: int = 1) -> List[Dict]:
+        """批量提取多个Word合同文件中的表格，按文件顺序合并结果
+
+        默认在当前进程中逐个提取。单个文件通常只需几十毫秒，而 spawn 启动一个子进程约 0.8 秒，
+        只有文件很多或单个文件很大时才值得由调用方传入 max_workers 交给多个进程并行提取
+        """
+        workers = min(max_workers, os.cpu_count() or 1, len(paths))
+        if workers <= 1:
+            results = map(self.extract_tables_from_word_contract, paths)
+            return [row for file_data in results for row in file_data]
         
+        data = []
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT) as executor:
+            for file_data in executor.map(self.extract_tables_from_word_contract, paths):
+                data.extend(file_data)
         return data
         
     def _is_target_table_custom(self, headers: List[str]) -> bool:
         """检查是否是目标表格（自定义表头）"""
         if self.custom_headers:
             # 使用自定义表头
-            found_headers = 0
-            for custom_header in self.custom_headers.keys():
-                for header in headers:
-                    if custom_header in header:
-                        found_headers += 1
-                        break
-            return found_headers >= 2
+            return _has_matched_keywords(tuple(headers), tuple(self.custom_headers), 2)
         else:
             # 使用默认表头
             return self._is_target_table(headers)
     
-    def _get_key_fields_for_check(self) -> List[str]:
-        """获取用于检查的关键字段列表"""
-        if self.custom_headers:
-            # 使用自定义表头
-            return list(self.custom_headers.keys())
-        else:
-            # 使用默认表头
-            return ['功能描述', '三级模块', '功能模块', '功能子项']
-    
-    def _map_word_row_custom(self, row_data: Dict, source_file: str, original_filename: str = None) -> Dict:
+    def _map_word_row_custom(self, row_data: Dict, source_file: str, original_filename: str = None,
+                             desc_field: str = '合同描述') -> Dict:
         """使用自定义表头映射Word行数据"""
         if self.custom_headers:
             # 使用自定义表头映射
-            mapped_data = {}
-            for header, value in row_data.items():
-                for custom_header, standard_field in self.custom_headers.items():
-                    if custom_header in header:
-                        mapped_data[standard_field] = value
-                        break
+            fields = _header_fields(tuple(row_data), tuple(self.custom_headers.items()))
+            mapped_data = {field: value for field, value in zip(fields, row_data.values()) if field is not None}
             
             # 确保Word合同内容映射到"合同描述"
             desc_value = mapped_data.get('合同描述', '')
@@ -853,53 +1101,31 @@ class PDFWordTableExtractor:
                 '一级模块名称': mapped_data.get('一级模块名称', ''),
                 '二级模块名称': mapped_data.get('二级模块名称', ''),
                 '三级模块名称': mapped_data.get('三级模块名称', ''),
-                '标书描述': '',  # Word合同文件，标书描述为空
-                '合同描述': desc_value,  # Word合同内容放这里
+                '标书描述': '',
+                '合同描述': '',
                 '来源文件': original_filename if original_filename else os.path.basename(source_file),
             }
+            # Word合同内容放 desc_field 指定的字段（默认合同描述）
+            mapped[desc_field] = desc_value
         else:
             # 使用默认映射
-            mapped = self._map_word_row(row_data, source_file)
+            mapped = self._map_word_row(row_data, source_file, desc_field)
         
         return mapped
     
     def _is_target_table(self, headers: List[str]) -> bool:
         """检查是否是目标表格（默认表头）"""
-        target_headers = list(self.target_columns.keys())
-        found_headers = []
-        
-        # 预处理目标字段名，去掉换行符
-        normalized_target_headers = {}
-        for target in target_headers:
-            normalized_target = target.replace('\n', '').replace('\\n', '')
-            normalized_target_headers[normalized_target] = target
-        
-        for normalized_target, original_target in normalized_target_headers.items():
-            for header_cell in headers:
-                # 对实际字段名也进行预处理
-                normalized_header = header_cell.replace('\n', '').replace('\\n', '')
-                if normalized_target in normalized_header:
-                    found_headers.append(original_target)
-                    break
-        
-        return len(found_headers) >= 2
+        # 预处理目标字段名，去掉换行符（实际字段名在匹配时同样处理）
+        normalized_targets = tuple(dict.fromkeys(
+            _normalize_header(target) for target in self.target_columns))
+        return _has_matched_keywords(tuple(headers), normalized_targets, 2, normalize=True)
     
-    def _map_word_row(self, row_data: Dict, source_file: str) -> Dict:
-        """映射Word行数据到标准格式"""
-        # 创建标准化字段映射
-        field_mapping = {}
-        for original_field in ['功能模块', '功能子项', '三级模块', '功能描述']:
-            normalized_field = original_field.replace('\n', '').replace('\\n', '')
-            field_mapping[normalized_field] = original_field
-        
-        # 查找匹配的字段
-        mapped_data = {}
-        for header, value in row_data.items():
-            normalized_header = header.replace('\n', '').replace('\\n', '')
-            for normalized_field, original_field in field_mapping.items():
-                if normalized_field in normalized_header:
-                    mapped_data[original_field] = value
-                    break
+    def _map_word_row(self, row_data: Dict, source_file: str, desc_field: str = '合同描述') -> Dict:
+        """映射Word行数据到标准格式，合同文件的内容写入 desc_field 指定的字段"""
+        # 查找匹配的字段（表头去掉换行符后匹配）
+        fields = _header_fields(tuple(row_data), _DEFAULT_WORD_FIELDS, normalize=True)
+        source_name, is_bid, is_contract = _word_source_info(source_file)
+        mapped_data = {field: value for field, value in zip(fields, row_data.values()) if field is not None}
         
         mapped = {
             '一级模块名称': mapped_data.get('功能模块', ''),
@@ -907,49 +1133,39 @@ class PDFWordTableExtractor:
             '三级模块名称': mapped_data.get('三级模块', ''),
             '标书描述': '',
             '合同描述': '',
-            '来源文件': os.path.basename(source_file) if not source_file.endswith('tmp') else '合同.docx',
+            '来源文件': source_name,
         }
         
         # 根据文件类型决定内容放哪个字段
-        if "标书" in source_file:
+        if is_bid:
             mapped['标书描述'] = mapped_data.get('功能描述', '')
-        elif "合同" in source_file:
-            mapped['合同描述'] = mapped_data.get('功能描述', '')
+        elif is_contract:
+            mapped[desc_field] = mapped_data.get('功能描述', '')
         
         return mapped
     
-    def _merge_paragraphs(self, desc_lines):
-        """合并自然段"""
-        desc_paragraphs = []
-        current_para = []
-        for line in desc_lines:
-            if not line.strip():
-                if current_para:
-                    desc_paragraphs.append(''.join(current_para))
-                    current_para = []
-            else:
-                current_para.append(line.strip())
-        if current_para:
-            desc_paragraphs.append(''.join(current_para))
-        return desc_paragraphs
+    def _emit(self, results, lvl1, lvl2, lvl3, desc_buf, source):
+        """输出一条结果，描述取自 desc_buf 并清空"""
+        results.append(_ResultRow(lvl1, lvl2, lvl3, desc_buf.pop_text(), source))
+
+    def _should_collect(self, has_lvl3_sample, in_lvl2, in_lvl3):
+        """判断是否应该收集描述内容"""
+        # 有三级模块样例时，只有在三级模块下才收集
+        if has_lvl3_sample:
+            return in_lvl3
+        # 没有三级模块样例时，在二级模块下收集
+        return in_lvl2
     
     def _clean_extracted_data(self, data: List[Dict]) -> List[Dict]:
         """清理提取的数据，过滤无效内容"""
         cleaned_data = []
         
         for item in data:
-            # 检查是否为页码信息
-            def is_page_content(text):
-                if not text:
-                    return False
-                page_indicators = ['第', '页', 'Page', 'page']
-                return any(indicator in str(text) for indicator in page_indicators)
-            
             # 清理各字段
             cleaned_item = {}
             for key, value in item.items():
-                if is_page_content(value):
-                    print(f"DEBUG: 过滤页码内容 '{value}' 从字段 '{key}'")
+                if _is_page_content(value):
+                    logger.debug("过滤页码内容 '%s' 从字段 '%s'", value, key)
                     cleaned_item[key] = ""
                 else:
                     cleaned_item[key] = value
@@ -967,39 +1183,41 @@ class PDFWordTableExtractor:
             logger.warning("没有数据需要输出")
             return None
         
+        def split_sentences(text, max_length):
+            """按句号分割并合并为不超过 max_length 的段（各句末尾补句号）"""
+            result = []
+            # 当前段的各部分及累计长度，避免反复拼接字符串
+            current_parts = []
+            current_length = 0
+            for sentence in _SENTENCE_SPLIT_RE.split(text):
+                if current_length + len(sentence) <= max_length:
+                    current_parts.append(sentence)
+                    current_parts.append("。")
+                    current_length += len(sentence) + 1
+                else:
+                    if current_parts:
+                        result.append(''.join(current_parts).strip())
+                    current_parts = [sentence, "。"]
+                    current_length = len(sentence) + 1
+            if current_parts:
+                result.append(''.join(current_parts).strip())
+            return result
+        
         # 新增：智能分段处理函数
         def split_long_description(description, max_length=500):
             """智能分段处理长描述"""
             if not description or len(description) <= max_length:
                 return [description]
             
-            # 预定义编号格式正则表达式
-            number_patterns = [
-                # 中文数字格式
-                r'[一二三四五六七八九十]+、',  # 一、二、三、
-                r'[（(][一二三四五六七八九十]+[）)]',  # （一）（二）
-                r'[（(]\d+[）)]',  # （1）（2）
-                r'\d+、',  # 1、2、
-                r'\d+\.',  # 1.2.3.
-                r'\d+）',  # 1）2）
-                r'\d+\)',  # 1)2)
-                
-                # 英文数字格式
-                r'\d+\.',  # 1.2.3.
-                r'[a-z]+\)',  # a)b)c)
-                r'[A-Z]+\.',  # A.B.C.
-                r'[i]+\)',  # i)ii)iii)
-            ]
-            
             # 尝试按编号分割
-            for pattern in number_patterns:
-                parts = re.split(f'({pattern})', description)
+            for pattern in _DESC_NUMBER_PATTERNS:
+                parts = pattern.split(description)
                 if len(parts) > 1:
                     # 重新组合分割的部分
                     result = []
                     current_part = ""
                     for i, part in enumerate(parts):
-                        if re.match(pattern, part):
+                        if pattern.match(part):
                             if current_part:
                                 result.append(current_part.strip())
                             current_part = part
@@ -1014,35 +1232,14 @@ class PDFWordTableExtractor:
                     for part in result:
                         if len(part) > max_length:
                             # 按句号分割
-                            sentences = re.split(r'[。！？]', part)
-                            current_sentence = ""
-                            for sentence in sentences:
-                                if len(current_sentence + sentence) <= max_length:
-                                    current_sentence += sentence + "。"
-                                else:
-                                    if current_sentence:
-                                        final_result.append(current_sentence.strip())
-                                    current_sentence = sentence + "。"
-                            if current_sentence:
-                                final_result.append(current_sentence.strip())
+                            final_result.extend(split_sentences(part, max_length))
                         else:
                             final_result.append(part)
                     
                     return final_result
             
             # 如果没有找到编号格式，按句号分割
-            sentences = re.split(r'[。！？]', description)
-            result = []
-            current_sentence = ""
-            for sentence in sentences:
-                if len(current_sentence + sentence) <= max_length:
-                    current_sentence += sentence + "。"
-                else:
-                    if current_sentence:
-                        result.append(current_sentence.strip())
-                    current_sentence = sentence + "。"
-            if current_sentence:
-                result.append(current_sentence.strip())
+            result = split_sentences(description, max_length)
             
             return result if result else [description]
         
@@ -1057,31 +1254,15 @@ class PDFWordTableExtractor:
                 counter += 1
             return f"{base}_{counter}{ext}"
         
-        def clean_cell_value(value):
-            """清理单元格值，移除非法字符"""
-            if not value:
-                return ""
-            
-            # 转换为字符串
-            value_str = str(value)
-            
-            # 移除控制字符和非法字符
-            cleaned = ''
-            for char in value_str:
-                # 只保留可打印字符和常见的中文字符
-                if char.isprintable() or '\u4e00' <= char <= '\u9fff':
-                    cleaned += char
-            
-            # 移除调试信息中的特殊字符
-            cleaned = cleaned.replace('🔍', '').replace('✅', '').replace('⚠️', '').replace('📋', '')
+        def clean_cell_column(column):
+            """清理一列单元格值，移除非法字符（按列批量处理）"""
+            values = column.astype(object)
+            # 空值输出为空字符串
+            not_empty = values.astype(bool)
             
-            # 移除多余的空白字符
-            cleaned = re.sub(r'\s+', ' ', cleaned.strip())
-            
-            # 移除Excel不允许的特殊字符
-            cleaned = re.sub(r'[^\w\s\u4e00-\u9fff.,，。！？：:()（）\-]', '', cleaned)
-            
-            return cleaned
+            # 每个单元格只遍历一次，各清理步骤依次在同一字符串上完成
+            cleaned = values.map(_clean_cell_text)
+            return cleaned.where(not_empty, '')
         
         # 清理数据
         cleaned_data = self._clean_extracted_data(data)
@@ -1093,97 +1274,77 @@ class PDFWordTableExtractor:
         # 处理长描述
         processed_data = []
         for item in cleaned_data:
-            processed_item = item.copy()
-            
-            # 处理标书描述
-            if processed_item.get('标书描述'):
-                desc_parts = split_long_description(processed_item['标书描述'])
-                for i, part in enumerate(desc_parts):
-                    if i == 0:
-                        processed_item['标书描述'] = part
-                    else:
-                        # 创建新行
-                        new_item = processed_item.copy()
-                        new_item['标书描述'] = part
-                        processed_data.append(new_item)
-                        processed_item = None
-                        break
-                if processed_item:
-                    processed_data.append(processed_item)
+            # 处理标书描述：每一段输出为一行，其余字段与原行相同
+            if item.get('标书描述'):
+                for part in split_long_description(item['标书描述']):
+                    processed_data.append({**item, '标书描述': part})
             else:
-                processed_data.append(processed_item)
+                processed_data.append(item.copy())
         
         # 创建DataFrame
         df = pd.DataFrame(processed_data)
         
         # 确保列顺序正确
         column_order = ['一级模块名称', '二级模块名称', '三级模块名称', '标书描述', '合同描述', '来源文件']
-        for col in column_order:
-            if col not in df.columns:
-                df[col] = ''
-        df = df[column_order]
+        df = df.reindex(columns=column_order, fill_value='')
         
         # 清理单元格值
         for col in df.columns:
-            df[col] = df[col].apply(clean_cell_value)
+            df[col] = clean_cell_column(df[col])
         
         # 获取唯一文件名
         output_path = get_unique_filename(output_path)
         
-        # 写入Excel
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='提取结果', index=False)
-            worksheet = writer.sheets['提取结果']
-            
-            # 设置列宽
-            column_widths = {'A': 15, 'B': 15, 'C': 15, 'D': 45, 'E': 45, 'F': 10}
-            for col, width in column_widths.items():
-                worksheet.column_dimensions[col].width = width
-            
-            # 设置表头样式
-            header_font = Font(bold=True, size=12)
-            header_alignment = Alignment(horizontal='center', vertical='center')
-            for col in range(1, len(column_order) + 1):
-                cell = worksheet.cell(row=1, column=col)
-                cell.font = header_font
-                cell.alignment = header_alignment
-            
-            # 设置数据行样式和行高
-            data_alignment = Alignment(horizontal='left', vertical='top', wrap_text=True)
-            for row in range(2, len(df) + 2):
-                # 计算每行最大字符数
-                max_chars = 0
-                for col in range(1, len(column_order) + 1):
-                    cell_value = str(worksheet.cell(row=row, column=col).value or '')
-                    lines = cell_value.split('\n')
-                    for line in lines:
-                        line_chars = len(line)
-                        if line_chars > 30:
-                            needed_lines = (line_chars // 30) + 1
-                            max_chars = max(max_chars, needed_lines * 30)
-                else:
-                            max_chars = max(max_chars, line_chars)
-                
-                # 计算行高
-                estimated_lines = max(1, (max_chars // 30) + 1)
-                row_height = max(20, estimated_lines * 18 + 10)
-                worksheet.row_dimensions[row].height = row_height
-                
-                # 设置单元格对齐方式
-                for col in range(1, len(column_order) + 1):
-                    cell = worksheet.cell(row=row, column=col)
-                    cell.alignment = data_alignment
+        # 写入Excel：只写模式逐行写出，样式和行高在写入时设置，写入后不再回读单元格
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet('提取结果')
+        
+        # 设置列宽
+        column_widths = {'A': 15, 'B': 15, 'C': 15, 'D': 45, 'E': 45, 'F': 10}
+        for col, width in column_widths.items():
+            worksheet.column_dimensions[col].width = width
+        
+        # 设置边框
+        thin_border = Border(
+            left=Side(style='thin'),
+            right=Side(style='thin'),
+            top=Side(style='thin'),
+            bottom=Side(style='thin')
+        )
+        
+        # 表头和数据单元格的样式注册为命名样式，每个单元格只需按名称引用一次，无需逐项设置字体、对齐和边框
+        workbook.add_named_style(NamedStyle(
+            name='表头', font=Font(bold=True, size=12),
+            alignment=Alignment(horizontal='center', vertical='center'), border=thin_border))
+        workbook.add_named_style(NamedStyle(
+            name='数据', font=DEFAULT_FONT,
+            alignment=Alignment(horizontal='left', vertical='top', wrap_text=True), border=thin_border))
+        
+        def styled_cell(value, style):
+            """创建带样式的单元格"""
+            cell = WriteOnlyCell(worksheet, value=value)
+            cell.style = style
+            return cell
+        
+        # 设置表头样式
+        worksheet.append([styled_cell(col, '表头') for col in column_order])
+        
+        # 计算行高：取每行最长的单元格，超过30字的按折行后的行数计
+        # （清理后单元格中的换行等空白已合并为空格，每个单元格只有一行；折行后的字数随长度单调不减，取最长单元格即可）
+        max_len = df.apply(lambda column: column.str.len()).max(axis=1)
+        max_chars = max_len.where(max_len <= 30, (max_len // 30 + 1) * 30)
+        estimated_lines = (max_chars // 30 + 1).clip(lower=1)
+        row_heights = (estimated_lines * 18 + 10).clip(lower=20)
+        
+        # 设置数据行样式和行高
+        for row, (values, row_height) in enumerate(zip(df.itertuples(index=False, name=None), row_heights.tolist()), start=2):
+            # 行高在只写模式下须在写入该行之前设置
+            worksheet.row_dimensions[row].height = row_height
             
-            # 设置边框
-            thin_border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            for row in worksheet.iter_rows(min_row=1, max_row=len(df) + 1, min_col=1, max_col=len(column_order)):
-                for cell in row:
-                    cell.border = thin_border
+            # 设置单元格对齐方式
+            worksheet.append([styled_cell(value, '数据') for value in values])
+        
+        workbook.save(output_path)
         
         return output_path
 